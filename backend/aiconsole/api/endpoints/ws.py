@@ -41,10 +41,10 @@ async def websocket_endpoint(
     try:
         while True:
             _log.debug("Waiting for message")
-            json_data = await connection.websocket.receive_json()
-            _log.debug(f"Received message: {json_data}")
+            text_data = await connection.websocket.receive_text()
+            _log.debug("Received message: %s", text_data)
             try:
-                await handle_incoming_message(connection, json_data)
+                await handle_incoming_message(connection, text_data)
             except Exception as e:
                 await connection.send(
                     ErrorServerMessage(error=f"Error handling message: {e} type={e.__class__.__name__}")
@@ -19,7 +19,9 @@ Connection manager for websockets. Keeps track of all active connections
 import logging
 from dataclasses import dataclass
 from functools import lru_cache
+from typing import Sequence
 
+import orjson
 from fastapi import WebSocket
 
 from aiconsole.api.websockets.base_server_message import BaseServerMessage
@@ -27,7 +29,18 @@ from aiconsole.api.websockets.base_server_message import BaseServerMessage
 _log = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+def _serialize(msg: BaseServerMessage) -> str:
+    return orjson.dumps({"type": msg.get_type(), **msg.model_dump(exclude_none=True, mode="json")}).decode()
+
+
+def parse_frame(data: str) -> list[dict]:
+    """
+    Parse a frame sent by AICConnection, which may carry multiple messages, one JSON document per line.
+    """
+    return [orjson.loads(line) for line in data.split("\n")]
+
+
+@dataclass(frozen=True, slots=True)
 class AcquiredLock:
     chat_id: str
     request_id: str
@@ -37,10 +50,19 @@ class AICConnection:
     def __init__(self, websocket: WebSocket):
         self.websocket = websocket
         self.open_chats_ids: set[str] = set()
-        self.acquired_locks: list[AcquiredLock] = []
+        self.acquired_locks: dict[tuple[str, str], AcquiredLock] = {}
 
     async def send(self, msg: BaseServerMessage):
-        await self.websocket.send_json({"type": msg.get_type(), **msg.model_dump(exclude_none=True, mode="json")})
+        await self.send_serialized(_serialize(msg))
+
+    async def send_many(self, msgs: Sequence[BaseServerMessage]):
+        """
+        Send multiple messages in a single frame, one JSON document per line.
+        """
+        await self.send_serialized("\n".join(_serialize(msg) for msg in msgs))
+
+    async def send_serialized(self, data: str):
+        await self.websocket.send_text(data)
 
 
 class ConnectionManager:
@@ -61,13 +83,21 @@ class ConnectionManager:
     async def send_to_chat(
         self, message: BaseServerMessage, chat_id: str, except_connection: AICConnection | None = None
     ):
+        # Serialize once and share the payload between all the recipients
+        data: str | None = None
         for connection in self.active_connections:
             if chat_id in connection.open_chats_ids and except_connection != connection:
-                await connection.send(message)
+                if data is None:
+                    data = _serialize(message)
+                await connection.send_serialized(data)
 
     async def send_to_all(self, message: BaseServerMessage):
+        if not self.active_connections:
+            return
+
+        data = _serialize(message)
         for connection in self.active_connections:
-            await connection.send(message)
+            await connection.send_serialized(data)
 
 
 @lru_cache
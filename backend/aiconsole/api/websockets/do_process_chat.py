@@ -16,6 +16,7 @@ from aiconsole.core.chat.actor_id import ActorId
 from aiconsole.core.chat.chat_mutations import CreateMessageGroupMutation
 from aiconsole.core.chat.chat_mutator import ChatMutator
 from aiconsole.core.chat.execution_modes.analysis.agents_to_choose_from import (
+    agent_to_choose_from,
     agents_to_choose_from,
 )
 from aiconsole.core.chat.execution_modes.utils.import_and_validate_execution_mode import (
@@ -35,9 +36,7 @@ async def do_process_chat(chat_mutator: ChatMutator):
 
     if chat_mutator.chat.chat_options.agent_id:
         # The user selected an agent for the chat
-        for _agent in agents_to_choose_from():
-            if _agent.id == chat_mutator.chat.chat_options.agent_id:
-                agent = _agent
+        agent = agent_to_choose_from(chat_mutator.chat.chat_options.agent_id)
 
         if not agent:
             await connection_manager().send_to_all(
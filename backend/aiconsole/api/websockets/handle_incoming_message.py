@@ -15,13 +15,16 @@
 # limitations under the License.
 import asyncio
 import logging
-from collections import defaultdict
-from typing import Any, Callable, cast
+from functools import partial
+from typing import Any, Callable, Coroutine, cast
 from uuid import uuid4
 
+import orjson
+
 from aiconsole.api.websockets.client_messages import (
     AcceptCodeClientMessage,
     AcquireLockClientMessage,
+    BaseClientMessage,
     CloseChatClientMessage,
     DuplicateChatClientMessage,
     InitChatMutationClientMessage,
@@ -66,65 +69,130 @@ from aiconsole.utils.events import InternalEvent, internal_events
 
 _log = logging.getLogger(__name__)
 
-_running_tasks: dict[str, dict[str, asyncio.Task]] = defaultdict(dict)
+max_running_tasks_per_chat = 32  # Receiving from a client pauses while it has this many tasks in flight for a chat
+
+
+class _ChatTasks:
+    """
+    Tasks running on behalf of a single chat, removes itself from _chats_tasks once nothing is running anymore.
+    """
+
+    def __init__(self, chat_id: str):
+        self.chat_id = chat_id
+        self._tasks: set[asyncio.Task] = set()
+        self._control_tasks: set[asyncio.Task] = set()
+        self._slots: dict[AICConnection, asyncio.BoundedSemaphore] = {}
+        self._spawning = 0
+
+    async def spawn(
+        self, connection: AICConnection, handler: Callable[..., Coroutine], message: Any, control: bool = False
+    ) -> None:
+        if control:
+            # Control messages free up a saturated chat, so they never wait for a slot, and stopping the chat
+            # leaves them running, so a second stop still gets its response and lock releases still go through
+            task = asyncio.create_task(handler(connection, message))
+            self._control_tasks.add(task)
+            task.add_done_callback(self._on_control_task_done)
+            return
+
+        # The connection's websocket endpoint awaits this before receiving the next frame, so waiting for a free
+        # slot here applies backpressure to that client. Slots are per connection, so a client filling up a chat
+        # never stalls the receive loop of another client that has the same chat open.
+        slots = self._slots.get(connection)
+        if slots is None:
+            slots = self._slots[connection] = asyncio.BoundedSemaphore(max_running_tasks_per_chat)
+
+        self._spawning += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._spawning -= 1
+
+        task = asyncio.create_task(handler(connection, message))
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._on_task_done, slots=slots))
+
+    async def cancel_all(self) -> None:
+        # Snapshot, as cancelled tasks remove themselves from the set. Control tasks, including the calling stop,
+        # are tracked separately and never cancelled.
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+
+        # Only return once the tasks have actually finished tearing down
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _on_task_done(self, task: asyncio.Task, slots: asyncio.BoundedSemaphore) -> None:
+        self._tasks.discard(task)
+        slots.release()
+        self._remove_if_idle()
+
+    def _on_control_task_done(self, task: asyncio.Task) -> None:
+        self._control_tasks.discard(task)
+        self._remove_if_idle()
+
+    def _remove_if_idle(self) -> None:
+        if (
+            not self._tasks
+            and not self._control_tasks
+            and not self._spawning
+            and _chats_tasks.get(self.chat_id) is self
+        ):
+            del _chats_tasks[self.chat_id]
+
+
+_chats_tasks: dict[str, _ChatTasks] = {}
+
+
+async def handle_incoming_message(connection: AICConnection, data: str):
+    # Parse here once, so handlers receive an already validated message
+    message = _parse_message(data)
+
+    handler = _handlers[type(message)]
+
+    _log.info("Handling message %s", message.get_type())
 
+    chat_tasks = _chats_tasks.get(message.chat_id)
+    if chat_tasks is None:
+        chat_tasks = _chats_tasks[message.chat_id] = _ChatTasks(message.chat_id)
 
-async def handle_incoming_message(connection: AICConnection, json: dict):
-    message_type = json["type"]
+    await chat_tasks.spawn(connection, handler, message, control=type(message) in _control_message_types)
 
-    handlers = {
-        AcquireLockClientMessage.__name__: _handle_acquire_lock_ws_message,
-        ReleaseLockClientMessage.__name__: _handle_release_lock_ws_message,
-        OpenChatClientMessage.__name__: _handle_open_chat_ws_message,
-        DuplicateChatClientMessage.__name__: _handle_duplicate_chat_ws_message,  # Register the new handler here.
-        StopChatClientMessage.__name__: _handle_stop_chat_ws_message,
-        CloseChatClientMessage.__name__: _handle_close_chat_ws_message,
-        InitChatMutationClientMessage.__name__: _handle_init_chat_mutation_ws_message,
-        AcceptCodeClientMessage.__name__: _handle_accept_code_ws_message,
-        ProcessChatClientMessage.__name__: _handle_process_chat_ws_message,
-    }
 
-    handler = handlers[message_type]
+def _parse_message(data: str) -> BaseClientMessage:
+    json = orjson.loads(data)
+    message_type = _message_types.get(json["type"])
 
-    _log.info(f"Handling message {message_type}")
+    if message_type is None:
+        raise ValueError(f"Unknown message type {json['type']}")
 
-    task_id = str(uuid4())
-    task = asyncio.create_task(handler(connection, json))
-    _running_tasks[json["chat_id"]][task_id] = task
-    task.add_done_callback(_get_done_callback(json["chat_id"], task_id))
+    return message_type.model_validate(json)
 
 
-async def _handle_acquire_lock_ws_message(connection: AICConnection, json: dict):
-    message: AcquireLockClientMessage | None = None
+async def _handle_acquire_lock_ws_message(connection: AICConnection, message: AcquireLockClientMessage):
     try:
-        message = AcquireLockClientMessage(**json)
         await acquire_lock(chat_id=message.chat_id, request_id=message.request_id)
 
-        connection.acquired_locks.append(
-            AcquiredLock(
-                chat_id=message.chat_id,
-                request_id=message.request_id,
-            )
+        connection.acquired_locks[(message.chat_id, message.request_id)] = AcquiredLock(
+            chat_id=message.chat_id,
+            request_id=message.request_id,
         )
 
-        _log.info(f"Acquired lock {message.request_id} {connection.acquired_locks}")
+        _log.info("Acquired lock %s %s", message.request_id, connection.acquired_locks.keys())
         await connection.send(
             ResponseServerMessage(request_id=message.request_id, payload={"chat_id": message.chat_id}, is_error=False)
         )
     except Exception:
-        if message is not None:
-            await connection.send(
-                ResponseServerMessage(
-                    request_id=message.request_id,
-                    payload={"error": "Error during acquiring lock", "chat_id": message.chat_id},
-                    is_error=True,
-                )
+        await connection.send(
+            ResponseServerMessage(
+                request_id=message.request_id,
+                payload={"error": "Error during acquiring lock", "chat_id": message.chat_id},
+                is_error=True,
             )
+        )
 
 
-async def _handle_release_lock_ws_message(connection: AICConnection, json: dict):
-    message = ReleaseLockClientMessage(**json)
-
+async def _handle_release_lock_ws_message(connection: AICConnection, message: ReleaseLockClientMessage):
     chat_mutator = SequentialChatMutator(
         DefaultChatMutator(
             chat_id=message.chat_id,
@@ -136,19 +204,13 @@ async def _handle_release_lock_ws_message(connection: AICConnection, json: dict)
     async def f():
         await release_lock(chat_id=message.chat_id, request_id=message.request_id)
 
-        lock_data = AcquiredLock(chat_id=message.chat_id, request_id=message.request_id)
-
-        if lock_data in connection.acquired_locks:
-            connection.acquired_locks.remove(lock_data)
-        else:
-            _log.error(f"Lock {lock_data} not found in {connection.acquired_locks}")
+        if connection.acquired_locks.pop((message.chat_id, message.request_id), None) is None:
+            _log.error(f"Lock {message.chat_id} {message.request_id} not found in {list(connection.acquired_locks)}")
 
     await chat_mutator.in_sequence(f)
 
 
-async def _handle_open_chat_ws_message(connection: AICConnection, json: dict):
-    message = OpenChatClientMessage(**json)
-
+async def _handle_open_chat_ws_message(connection: AICConnection, message: OpenChatClientMessage):
     try:
         connection.open_chats_ids.add(message.chat_id)
 
@@ -163,16 +225,15 @@ async def _handle_open_chat_ws_message(connection: AICConnection, json: dict):
         chat = await chat_mutator.read()
 
         if message.chat_id in connection.open_chats_ids:
-            await connection.send(
-                ResponseServerMessage(
-                    request_id=message.request_id, payload={"chat_id": message.chat_id}, is_error=False
-                )
-            )
-
-            await connection.send(
-                ChatOpenedServerMessage(
-                    chat=chat,
-                )
+            await connection.send_many(
+                [
+                    ResponseServerMessage(
+                        request_id=message.request_id, payload={"chat_id": message.chat_id}, is_error=False
+                    ),
+                    ChatOpenedServerMessage(
+                        chat=chat,
+                    ),
+                ]
             )
     except Exception as e:
         _log.error(f"Error during opening chat {message.chat_id}: {e}")
@@ -187,8 +248,7 @@ async def _handle_open_chat_ws_message(connection: AICConnection, json: dict):
         )
 
 
-async def _handle_duplicate_chat_ws_message(connection: AICConnection, json: dict):
-    message = DuplicateChatClientMessage(**json)
+async def _handle_duplicate_chat_ws_message(connection: AICConnection, message: DuplicateChatClientMessage):
     # Implement the logic for duplicating a chat here.
     # This is a placeholder implementation.
     new_chat_id = str(uuid4())
@@ -210,30 +270,27 @@ async def _handle_duplicate_chat_ws_message(connection: AICConnection, json: dic
         )
 
 
-async def _handle_stop_chat_ws_message(connection: AICConnection, json: dict):
-    message: StopChatClientMessage | None = None
+async def _handle_stop_chat_ws_message(connection: AICConnection, message: StopChatClientMessage):
     try:
-        message = StopChatClientMessage(**json)
         reset_code_interpreters(chat_id=message.chat_id)
-        for task in _running_tasks[message.chat_id].values():
-            task.cancel()
+
+        if chat_tasks := _chats_tasks.get(message.chat_id):
+            await chat_tasks.cancel_all()
+
         await connection.send(
             ResponseServerMessage(request_id=message.request_id, payload={"chat_id": message.chat_id}, is_error=False)
         )
     except Exception:
-        if message is not None:
-            await connection.send(
-                ResponseServerMessage(
-                    request_id=message.request_id,
-                    payload={"error": "Error during closing chat", "chat_id": message.chat_id},
-                    is_error=True,
-                )
+        await connection.send(
+            ResponseServerMessage(
+                request_id=message.request_id,
+                payload={"error": "Error during closing chat", "chat_id": message.chat_id},
+                is_error=True,
             )
+        )
 
 
-async def _handle_close_chat_ws_message(connection: AICConnection, json: dict):
-    message = CloseChatClientMessage(**json)
-
+async def _handle_close_chat_ws_message(connection: AICConnection, message: CloseChatClientMessage):
     if message.chat_id in connection.open_chats_ids:
         connection.open_chats_ids.discard(message.chat_id)
 
@@ -254,9 +311,9 @@ async def _handle_close_chat_ws_message(connection: AICConnection, json: dict):
         # )
 
 
-async def _handle_init_chat_mutation_ws_message(connection: AICConnection | None, json: dict):
-    message = InitChatMutationClientMessage(**json)
-
+async def _handle_init_chat_mutation_ws_message(
+    connection: AICConnection | None, message: InitChatMutationClientMessage
+):
     mutator = SequentialChatMutator(
         DefaultChatMutator(chat_id=message.chat_id, request_id=message.request_id, connection=connection)
     )
@@ -264,13 +321,11 @@ async def _handle_init_chat_mutation_ws_message(connection: AICConnection | None
     await mutator.mutate(message.mutation)
 
 
-async def _handle_accept_code_ws_message(connection: AICConnection, json: dict):
+async def _handle_accept_code_ws_message(connection: AICConnection, message: AcceptCodeClientMessage):
     events_to_sub: list[type[InternalEvent]] = [
         WaitForEnvEvent,
     ]
 
-    message = AcceptCodeClientMessage(**json)
-
     async def _notify(event):
         if isinstance(event, WaitForEnvEvent):
             await connection_manager().send_to_chat(
@@ -328,11 +383,11 @@ async def _handle_accept_code_ws_message(connection: AICConnection, json: dict):
                 event,
                 _notify,
             )
-        await release_lock(chat_id=message.chat_id, request_id=message.request_id)
+        # Stopping the chat cancels this task, the lock must still be released or the chat stays locked
+        await asyncio.shield(release_lock(chat_id=message.chat_id, request_id=message.request_id))
 
 
-async def _handle_process_chat_ws_message(connection: AICConnection, json: dict):
-    message = ProcessChatClientMessage(**json)
+async def _handle_process_chat_ws_message(connection: AICConnection, message: ProcessChatClientMessage):
     try:
         chat_mutator = SequentialChatMutator(
             DefaultChatMutator(
@@ -351,11 +406,27 @@ async def _handle_process_chat_ws_message(connection: AICConnection, json: dict)
 
         await do_process_chat(chat_mutator)
     finally:
-        await release_lock(chat_id=message.chat_id, request_id=message.request_id)
-
-
-def _get_done_callback(chat_id: str, task_id: str) -> Callable:
-    def remove_running_task(_: Any) -> None:
-        del _running_tasks[chat_id][task_id]
+        await asyncio.shield(release_lock(chat_id=message.chat_id, request_id=message.request_id))
+
+
+_handlers: dict[type[BaseClientMessage], Callable[[AICConnection, Any], Coroutine]] = {
+    AcquireLockClientMessage: _handle_acquire_lock_ws_message,
+    ReleaseLockClientMessage: _handle_release_lock_ws_message,
+    OpenChatClientMessage: _handle_open_chat_ws_message,
+    DuplicateChatClientMessage: _handle_duplicate_chat_ws_message,
+    StopChatClientMessage: _handle_stop_chat_ws_message,
+    CloseChatClientMessage: _handle_close_chat_ws_message,
+    InitChatMutationClientMessage: _handle_init_chat_mutation_ws_message,
+    AcceptCodeClientMessage: _handle_accept_code_ws_message,
+    ProcessChatClientMessage: _handle_process_chat_ws_message,
+}
+
+_control_message_types: set[type[BaseClientMessage]] = {
+    StopChatClientMessage,
+    ReleaseLockClientMessage,
+    CloseChatClientMessage,
+}
 
-    return remove_running_task
+_message_types: dict[str, type[BaseClientMessage]] = {
+    message_type.__name__: message_type for message_type in _handlers
+}
@@ -1,3 +1,4 @@
+import asyncio
 from dataclasses import dataclass
 from typing import cast
 
@@ -17,7 +18,7 @@ from aiconsole.core.project import project
 from aiconsole.utils.events import InternalEvent, internal_events
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MaterialsAndRenderedMaterials:
     materials: list[AICMaterial]
     rendered_materials: list[RenderedMaterial]
@@ -25,6 +26,15 @@ class MaterialsAndRenderedMaterials:
 
 async def render_materials(
     materials_ids: list[str], chat: AICChat, agent: AICAgent, init: bool = False
+) -> MaterialsAndRenderedMaterials:
+    assets = project.get_project_assets()
+    relevant_materials = cast(list[AICMaterial], [assets.get_asset(material_id) for material_id in materials_ids])
+
+    return await render_loaded_materials(relevant_materials, chat, agent)
+
+
+async def render_loaded_materials(
+    relevant_materials: list[AICMaterial], chat: AICChat, agent: AICAgent
 ) -> MaterialsAndRenderedMaterials:
     events_to_sub: list[type[InternalEvent]] = [
         MaterialRenderErrorEvent,
@@ -44,10 +54,6 @@ async def render_materials(
                 _notify,
             )
 
-        relevant_materials = [
-            cast(AICMaterial, project.get_project_assets().get_asset(material_id)) for material_id in materials_ids
-        ]
-
         content_context = ContentEvaluationContext(
             chat=chat,
             agent=agent,
@@ -55,12 +61,19 @@ async def render_materials(
             relevant_materials=relevant_materials,
         )
 
-        rendered_materials = []
-        for material in relevant_materials:
-            rendered_material = await material.render(content_context)
-            rendered_materials.append(rendered_material)
+        # Materials render independently of each other, so run them concurrently. Let all of them settle
+        # before raising, so none outlives the error subscription or the caller's chat lock.
+        results = await asyncio.gather(
+            *(material.render(content_context) for material in relevant_materials), return_exceptions=True
+        )
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
-        return MaterialsAndRenderedMaterials(materials=relevant_materials, rendered_materials=rendered_materials)
+        return MaterialsAndRenderedMaterials(
+            materials=relevant_materials, rendered_materials=cast(list[RenderedMaterial], results)
+        )
     finally:
         for event in events_to_sub:
             internal_events().unsubscribe(
@@ -0,0 +1,192 @@
+import asyncio
+
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from aiconsole.api.websockets import handle_incoming_message as module
+from aiconsole.api.websockets.client_messages import (
+    OpenChatClientMessage,
+    StopChatClientMessage,
+)
+from aiconsole.api.websockets.connection_manager import AICConnection
+
+
+@pytest.fixture(autouse=True)
+def chats_tasks(monkeypatch: pytest.MonkeyPatch) -> dict[str, module._ChatTasks]:
+    chats_tasks: dict[str, module._ChatTasks] = {}
+    monkeypatch.setattr(module, "_chats_tasks", chats_tasks)
+    monkeypatch.setattr(module, "max_running_tasks_per_chat", 2)
+    return chats_tasks
+
+
+@pytest.fixture
+def connection() -> AICConnection:
+    return AICConnection(None)  # type: ignore
+
+
+def _register(chats_tasks: dict[str, module._ChatTasks], chat_id: str = "chat") -> module._ChatTasks:
+    chat_tasks = chats_tasks[chat_id] = module._ChatTasks(chat_id)
+    return chat_tasks
+
+
+async def _wait_for(connection: AICConnection, event: asyncio.Event):
+    await event.wait()
+
+
+@pytest.mark.asyncio
+async def test_should_spawn_wait_for_a_slot_when_chat_is_at_the_limit(chats_tasks, connection):
+    chat_tasks = _register(chats_tasks)
+    release = asyncio.Event()
+
+    await chat_tasks.spawn(connection, _wait_for, release)
+    await chat_tasks.spawn(connection, _wait_for, release)
+
+    spawn = asyncio.create_task(chat_tasks.spawn(connection, _wait_for, asyncio.Event()))
+    await asyncio.sleep(0)
+
+    assert not spawn.done()
+
+    release.set()
+    await asyncio.wait_for(spawn, timeout=1)
+
+    await chat_tasks.cancel_all()
+
+
+@pytest.mark.asyncio
+async def test_should_not_wait_for_slots_taken_by_another_connection(chats_tasks, connection):
+    chat_tasks = _register(chats_tasks)
+    other_connection = AICConnection(None)  # type: ignore
+    release = asyncio.Event()
+
+    await chat_tasks.spawn(connection, _wait_for, release)
+    await chat_tasks.spawn(connection, _wait_for, release)
+
+    await asyncio.wait_for(chat_tasks.spawn(other_connection, _wait_for, release), timeout=1)
+
+    await chat_tasks.cancel_all()
+
+
+@pytest.mark.asyncio
+async def test_should_spawn_control_task_without_a_slot(chats_tasks, connection):
+    chat_tasks = _register(chats_tasks)
+    release = asyncio.Event()
+
+    await chat_tasks.spawn(connection, _wait_for, release)
+    await chat_tasks.spawn(connection, _wait_for, release)
+
+    await asyncio.wait_for(chat_tasks.spawn(connection, _wait_for, release, control=True), timeout=1)
+
+    release.set()
+    await asyncio.sleep(0)
+
+    # Only the two slotted tasks gave their slots back, so the connection is at the limit again
+    await chat_tasks.spawn(connection, _wait_for, release)
+    await chat_tasks.spawn(connection, _wait_for, release)
+    assert chat_tasks._slots[connection].locked()
+
+
+@pytest.mark.asyncio
+async def test_should_cancel_all_cancel_every_non_control_task_and_wait_for_them(chats_tasks, connection):
+    chat_tasks = _register(chats_tasks)
+    torn_down: list[str] = []
+    stopped = asyncio.Event()
+
+    async def running(connection: AICConnection, name: str):
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await asyncio.sleep(0)
+            torn_down.append(name)
+
+    async def stop(connection: AICConnection, message: None):
+        await chat_tasks.cancel_all()
+        assert sorted(torn_down) == ["a", "b"]
+        stopped.set()
+
+    await chat_tasks.spawn(connection, running, "a")
+    await chat_tasks.spawn(connection, running, "b")
+    await asyncio.sleep(0)
+
+    await chat_tasks.spawn(connection, stop, None, control=True)
+
+    await asyncio.wait_for(stopped.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_should_remove_chat_from_registry_after_last_task(
+    chats_tasks, connection, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(module, "max_running_tasks_per_chat", 1)
+    chat_tasks = _register(chats_tasks)
+    first_release = asyncio.Event()
+    second_release = asyncio.Event()
+
+    await chat_tasks.spawn(connection, _wait_for, first_release)
+    spawn = asyncio.create_task(chat_tasks.spawn(connection, _wait_for, second_release))
+    await asyncio.sleep(0)
+
+    # The first task finishing while a spawn waits for its slot must not drop the entry
+    first_release.set()
+    await asyncio.wait_for(spawn, timeout=1)
+    assert chats_tasks.get("chat") is chat_tasks
+
+    second_release.set()
+    await asyncio.gather(*chat_tasks._tasks)
+
+    assert "chat" not in chats_tasks
+
+
+@pytest.mark.asyncio
+async def test_should_dispatch_message_to_its_handler(chats_tasks, connection, monkeypatch: pytest.MonkeyPatch):
+    handled: list[OpenChatClientMessage] = []
+
+    async def handler(connection: AICConnection, message: OpenChatClientMessage):
+        handled.append(message)
+
+    monkeypatch.setitem(module._handlers, OpenChatClientMessage, handler)
+
+    await module.handle_incoming_message(
+        connection,
+        orjson.dumps({"type": "OpenChatClientMessage", "chat_id": "chat", "request_id": "request"}).decode(),
+    )
+    await asyncio.gather(*chats_tasks["chat"]._tasks)
+
+    assert handled == [OpenChatClientMessage(chat_id="chat", request_id="request")]
+    assert "chat" not in chats_tasks
+
+
+@pytest.mark.asyncio
+async def test_should_stop_chat_twice_in_a_row(chats_tasks, connection, monkeypatch: pytest.MonkeyPatch):
+    responses: list[str] = []
+
+    async def stop(connection: AICConnection, message: StopChatClientMessage):
+        await chats_tasks[message.chat_id].cancel_all()
+        responses.append(message.request_id)
+
+    monkeypatch.setitem(module._handlers, StopChatClientMessage, stop)
+
+    chat_tasks = _register(chats_tasks)
+    await chat_tasks.spawn(connection, _wait_for, asyncio.Event())
+
+    for request_id in ["first", "second"]:
+        await module.handle_incoming_message(
+            connection,
+            orjson.dumps({"type": "StopChatClientMessage", "chat_id": "chat", "request_id": request_id}).decode(),
+        )
+
+    await asyncio.wait_for(asyncio.gather(*chat_tasks._control_tasks), timeout=1)
+
+    # Neither stop cancelled the other, so both responded
+    assert sorted(responses) == ["first", "second"]
+    assert "chat" not in chats_tasks
+
+
+def test_should_reject_unknown_message_type():
+    with pytest.raises(ValueError, match="Unknown message type"):
+        module._parse_message(orjson.dumps({"type": "UnknownClientMessage", "chat_id": "chat"}).decode())
+
+
+def test_should_reject_invalid_message():
+    with pytest.raises(ValidationError):
+        module._parse_message(orjson.dumps({"type": "CloseChatClientMessage", "chat_id": "chat"}).decode())
@@ -13,3 +13,16 @@ def agents_to_choose_from() -> list[AICAgent]:
     assets = [asset for asset in assets if asset.type == AssetType.AGENT and asset.id != DIRECTOR_AGENT_ID]
 
     return cast(list[AICAgent], assets)
+
+
+def agent_to_choose_from(agent_id: str) -> AICAgent | None:
+    """
+    Same filtering as agents_to_choose_from, but for a single agent looked up directly by id.
+    """
+    if agent_id == DIRECTOR_AGENT_ID:
+        return None
+
+    return cast(
+        AICAgent | None,
+        project.get_project_assets().get_asset(agent_id, type=AssetType.AGENT, enabled=True),
+    )
@@ -26,9 +26,10 @@ def create_materials_str(materials_ids: list | None, ai_can_add_extra_materials:
     # We add forced becuase it may influence the choice of enabled materials
     available_materials = []
     if materials_ids:
-        for material in project.get_project_assets()._assets.values():
-            if material[0].id in materials_ids:
-                available_materials.append(material[0])
+        assets = project.get_project_assets()
+        available_materials = [
+            asset for material_id in dict.fromkeys(materials_ids) if (asset := assets.get_asset(material_id))
+        ]
 
     if ai_can_add_extra_materials:
         available_materials = [
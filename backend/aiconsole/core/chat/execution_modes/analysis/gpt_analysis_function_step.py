@@ -52,6 +52,18 @@ from aiconsole.core.project import project
 
 _log = logging.getLogger(__name__)
 
+# Pseudo agent the director can pick to hand the turn back to the user, all fields are constants so skip validation
+_user_agent = AICAgent.model_construct(
+    id="user",
+    name="User",
+    usage="When a human user needs to respond",
+    usage_examples=[],
+    system="",
+    defined_in=AssetLocation.AICONSOLE_CORE,
+    override=False,
+    last_modified=datetime.now(),
+)
+
 
 def pick_agent(arguments, chat: AICChat, available_agents: list[AICAgent]) -> AICAgent:
     # Try support first
@@ -75,10 +87,11 @@ def pick_agent(arguments, chat: AICChat, available_agents: list[AICAgent]) -> AI
 
 
 def _get_relevant_materials(relevant_material_ids: list[str]) -> list[AICMaterial]:
+    assets = project.get_project_assets()
     return [
-        cast(AICMaterial, k)
-        for k in project.get_project_assets().assets_with_enabled_flag_set_to(True)
-        if k.id in relevant_material_ids
+        cast(AICMaterial, asset)
+        for material_id in dict.fromkeys(relevant_material_ids)
+        if (asset := assets.get_asset(material_id, enabled=True))
     ]
 
 
@@ -117,9 +130,12 @@ async def gpt_analysis_function_step(
     available_materials = []
     forced_materials = []
     if chat_mutator.chat.chat_options.materials_ids:
-        for material in project.get_project_assets()._assets.values():
-            if material[0].id in chat_mutator.chat.chat_options.materials_ids:
-                forced_materials.append(material[0])
+        assets = project.get_project_assets()
+        forced_materials = [
+            asset
+            for material_id in dict.fromkeys(chat_mutator.chat.chat_options.materials_ids)
+            if (asset := assets.get_asset(material_id))
+        ]
 
     if chat_mutator.chat.chat_options.ai_can_add_extra_materials:
         available_materials = [
@@ -133,16 +149,7 @@ async def gpt_analysis_function_step(
 
     plan_class = create_plan_class(
         [
-            AICAgent(
-                id="user",
-                name="User",
-                usage="When a human user needs to respond",
-                usage_examples=[],
-                system="",
-                defined_in=AssetLocation.AICONSOLE_CORE,
-                override=False,
-                last_modified=datetime.now(),
-            ),
+            _user_agent,
             *possible_agent_choices,
         ],
         available_materials,
@@ -17,11 +17,9 @@
 import logging
 
 from aiconsole.api.websockets.connection_manager import connection_manager
+from aiconsole.api.websockets.render_materials import render_loaded_materials
 from aiconsole.api.websockets.server_messages import NotificationServerMessage
 from aiconsole.core.assets.agents.agent import AICAgent
-from aiconsole.core.assets.materials.content_evaluation_context import (
-    ContentEvaluationContext,
-)
 from aiconsole.core.assets.materials.material import AICMaterial
 from aiconsole.core.assets.materials.rendered_material import RenderedMaterial
 from aiconsole.core.chat.chat_mutations import DeleteMessageGroupMutation
@@ -69,24 +67,15 @@ async def _execution_mode_process(
     analysis = await director_analyse(chat_mutator, last_message_group.id)
 
     if analysis.agent.id != "user" and analysis.next_step:
-        content_context = ContentEvaluationContext(
-            chat=chat_mutator.chat,
-            agent=analysis.agent,
-            gpt_mode=analysis.agent.gpt_mode,
-            relevant_materials=analysis.relevant_materials,
-        )
-
-        rendered_materials = [
-            await material.render(content_context) for material in content_context.relevant_materials
-        ]
+        mats = await render_loaded_materials(analysis.relevant_materials, chat_mutator.chat, analysis.agent)
 
         execution_mode = await import_and_validate_execution_mode(analysis.agent, chat_mutator.chat.id)
 
         await execution_mode.process_chat(
             chat_mutator=chat_mutator,
             agent=analysis.agent,
-            materials=analysis.relevant_materials,
-            rendered_materials=rendered_materials,
+            materials=mats.materials,
+            rendered_materials=mats.rendered_materials,
         )
     else:
         # Delete the current message group
@@ -1,5 +1,6 @@
 import importlib
 from dataclasses import dataclass
+from functools import lru_cache
 
 from aiconsole.api.websockets.connection_manager import connection_manager
 from aiconsole.api.websockets.server_messages import NotificationServerMessage
@@ -13,6 +14,12 @@ class ExecutionModeWarningEvent(InternalEvent):
     pass
 
 
+@lru_cache
+def _import_execution_mode(module_name: str, object_name: str):
+    module = importlib.import_module(module_name)
+    return getattr(module, object_name, None), getattr(module, "emit_warning_event", None)
+
+
 async def import_and_validate_execution_mode(agent: AICAgent, chat_id: str):
     events_to_sub: list[type[InternalEvent]] = [
         ExecutionModeWarningEvent,
@@ -53,9 +60,7 @@ async def import_and_validate_execution_mode(agent: AICAgent, chat_id: str):
             )
 
         module_name, object_name = execution_mode.split(":")
-        module = importlib.import_module(module_name)
-        obj = getattr(module, object_name, None)
-        emit_warning_event = getattr(module, "emit_warning_event", None)
+        obj, emit_warning_event = _import_execution_mode(module_name, object_name)
         if emit_warning_event:
             await emit_warning_event()
 
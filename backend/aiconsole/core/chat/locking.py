@@ -35,14 +35,14 @@ _log = logging.getLogger(__name__)
 
 async def wait_for_lock(chat_id: str) -> None:
     try:
-        _log.debug(f"Waiting for lock {chat_id}")
+        _log.debug("Waiting for lock %s", chat_id)
         await asyncio.wait_for(lock_events[chat_id].wait(), timeout=lock_timeout)
     except asyncio.TimeoutError:
         raise HTTPException(status_code=408, detail="Lock acquisition timed out")
 
 
 async def acquire_lock(chat_id: str, request_id: str, skip_mutating_clients: bool = False):
-    _log.debug(f"Acquiring lock {chat_id} {request_id}")
+    _log.debug("Acquiring lock %s %s", chat_id, request_id)
     if chat_id in chats and chats[chat_id].lock_id:
         await wait_for_lock(chat_id)
 
@@ -65,7 +65,7 @@ async def acquire_lock(chat_id: str, request_id: str, skip_mutating_clients: boo
 
 
 async def _read_chat_outside_of_lock(chat_id: str):
-    _log.debug(f"Reading chat {chat_id}")
+    _log.debug("Reading chat %s", chat_id)
     if chat_id not in chats:
         return await load_chat_history(chat_id)
 
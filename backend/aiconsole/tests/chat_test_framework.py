@@ -20,6 +20,7 @@ from aiconsole.api.websockets.client_messages import (
     ProcessChatClientMessage,
     ReleaseLockClientMessage,
 )
+from aiconsole.api.websockets.connection_manager import parse_frame
 from aiconsole.app import app
 from aiconsole.core.chat.actor_id import ActorId
 from aiconsole.core.chat.chat_mutations import (
@@ -120,19 +121,22 @@ class ChatTestFramework:
 
         return await self._get_chat_messages_for_agent(agent_id)
 
+    def _receive_messages(self, websocket: Any) -> list[dict]:
+        return parse_frame(websocket.receive_text())
+
     def _wait_for_mutation_type(self, mutation_type: str, websocket: Any) -> None:
         while True:
-            json = websocket.receive_json()
-            if mutation := json.get("mutation"):
-                if mutation["type"] == mutation_type:
-                    return
+            for message in self._receive_messages(websocket):
+                if mutation := message.get("mutation"):
+                    if mutation["type"] == mutation_type:
+                        return
 
     def _wait_for_websocket_response(self, response_type: str, websocket: Any) -> None:
         tries_count = 0
         while tries_count < 100:
-            json = websocket.receive_json()
-            if json["type"] == response_type:
-                return
+            for message in self._receive_messages(websocket):
+                if message["type"] == response_type:
+                    return
             tries_count += 1
             sleep(0.1)
 
@@ -8,6 +8,7 @@ from aiconsole.api.websockets.client_messages import (
     OpenChatClientMessage,
     ProcessChatClientMessage,
 )
+from aiconsole.api.websockets.connection_manager import parse_frame
 from aiconsole.app import app
 
 #
@@ -35,8 +36,8 @@ async def main():
         print(response.content)
 
         with client.websocket_connect("/ws") as websocket:
-            data = websocket.receive_json()
-            print(data)
+            for data in parse_frame(websocket.receive_text()):
+                print(data)
 
             chat_info = client.get("/api/chats").json()[0]
 
@@ -48,10 +49,10 @@ async def main():
             await ProcessChatClientMessage(chat_id=chat_info["id"], request_id=request_id).send(websocket)
 
             while True:
-                data = websocket.receive_json()
-                print(data)
-                if data["type"] == "LockReleasedServerMessage" and data["request_id"] == "test":
-                    break
+                for data in parse_frame(websocket.receive_text()):
+                    print(data)
+                    if data["type"] == "LockReleasedServerMessage" and data["request_id"] == "test":
+                        return
 
 
 if __name__ == "__main__":
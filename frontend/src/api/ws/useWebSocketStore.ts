@@ -37,6 +37,9 @@ export type WebSockeStore = {
   initStarted: boolean;
 };
 
+// A single frame may carry multiple messages, one JSON document per line
+const parseFrame = (data: string): unknown[] => data.split('\n').map((line) => JSON.parse(line));
+
 // Create Zustand store
 export const useWebSocketStore = create<WebSockeStore>((set, get) => ({
   ws: null,
@@ -57,11 +60,13 @@ export const useWebSocketStore = create<WebSockeStore>((set, get) => ({
     };
 
     ws.onmessage = async (e: MessageEvent) => {
-      const parsedData = ServerMessageSchema.safeParse(JSON.parse(e.data));
-      if (parsedData.success) {
-        handleServerMessage(parsedData.data);
-      } else {
-        console.log('Error parsing message: ', parsedData.error);
+      for (const data of parseFrame(e.data)) {
+        const parsedData = ServerMessageSchema.safeParse(data);
+        if (parsedData.success) {
+          handleServerMessage(parsedData.data);
+        } else {
+          console.log('Error parsing message: ', parsedData.error);
+        }
       }
     };
 
@@ -105,12 +110,15 @@ export const useWebSocketStore = create<WebSockeStore>((set, get) => ({
       // Handler for incoming messages
       const messageHandler = (e: MessageEvent) => {
         try {
-          const incomingMessage = ServerMessageSchema.parse(JSON.parse(e.data));
-
-          // Check if the incoming message meets the criteria
-          if (responseCriteria(incomingMessage)) {
-            cleanup();
-            resolve(incomingMessage);
+          for (const data of parseFrame(e.data)) {
+            const incomingMessage = ServerMessageSchema.parse(data);
+
+            // Check if the incoming message meets the criteria
+            if (responseCriteria(incomingMessage)) {
+              cleanup();
+              resolve(incomingMessage);
+              return;
+            }
           }
         } catch (error) {
           cleanup();